@@ -2,3 +2,54 @@
 protocol.py
 """
 
+from typing import Any, Dict, Optional
+
+
+class ProtocolRegistry:
+    """Registry of named protocol instances"""
+
+    def __init__(self):
+        self._protocols: Dict[str, Any] = {}
+        # Bumped on register/unregister and on start/stop through the
+        # registry, so callers can cache derived responses keyed on it
+        self._version = 0
+
+    @property
+    def version(self) -> int:
+        """Monotonic counter of registry changes"""
+        return self._version
+
+    def register(self, name: str, protocol: Any) -> None:
+        """Register a protocol under the given name"""
+        self._protocols[name] = protocol
+        self._version += 1
+
+    def unregister(self, name: str) -> None:
+        """Remove a protocol from the registry"""
+        if self._protocols.pop(name, None) is not None:
+            self._version += 1
+
+    def get(self, name: str) -> Optional[Any]:
+        """Return the protocol registered under name, or None"""
+        return self._protocols.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._protocols
+
+    async def start(self, name: str) -> None:
+        """Start the named protocol and mark cached views stale"""
+        try:
+            await self._protocols[name].start()
+        finally:
+            self._version += 1
+
+    async def stop(self, name: str) -> None:
+        """Stop the named protocol and mark cached views stale"""
+        try:
+            await self._protocols[name].stop()
+        finally:
+            self._version += 1
+
+    def list_protocols(self) -> Dict[str, Any]:
+        """Return a snapshot of all registered protocols"""
+        return dict(self._protocols)
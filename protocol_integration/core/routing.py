@@ -2,3 +2,59 @@
 routing.py
 """
 
+import asyncio
+import logging
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class MessageDispatcher:
+    """Deliver outbound messages through bounded per-protocol queues
+
+    Each protocol gets a queue holding at most ``maxsize`` messages, drained
+    by ``workers`` sender coroutines that are started on first use.
+    """
+
+    def __init__(self, maxsize: int = 1000, workers: int = 4):
+        self.maxsize = maxsize
+        self.workers = workers
+        self._queues: Dict[Any, asyncio.Queue] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def submit(self, protocol: Any, message: Any) -> bool:
+        """Queue a message for delivery, returning False if the queue is full"""
+        queue = self._queues.get(protocol)
+        if queue is None:
+            queue = self._start(protocol)
+
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    async def close(self) -> None:
+        """Stop all sender workers, dropping undelivered messages"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._queues.clear()
+
+    def _start(self, protocol: Any) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.maxsize)
+        self._queues[protocol] = queue
+        for _ in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._sender(protocol, queue)))
+        return queue
+
+    async def _sender(self, protocol: Any, queue: asyncio.Queue) -> None:
+        while True:
+            message = await queue.get()
+            try:
+                await protocol.send_message(message)
+            except Exception as e:
+                logger.error(f"Error sending message: {e}")
+            finally:
+                queue.task_done()
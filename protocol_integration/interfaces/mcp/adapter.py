@@ -1,29 +1,51 @@
 import asyncio
-import json
 import websockets
-from typing import Dict, Any, List, Optional
-import os
+from websockets.exceptions import ConnectionClosed
+from websockets.extensions.permessage_deflate import ServerPerMessageDeflateFactory
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union
 import logging
 
+try:
+    import uvloop
+except ImportError:  # fall back to the default asyncio event loop
+    uvloop = None
+
 from protocol_integration.core.protocol import ProtocolRegistry
 from protocol_integration.core.message import Message
+from protocol_integration.core.routing import MessageDispatcher
+from protocol_integration.interfaces.mcp.wire import CODECS, Codec, codec_for
 from protocol_integration.llm.client import LLMClient
+from protocol_integration.utils.config import Config
 
 logger = logging.getLogger(__name__)
 
+# Seconds to wait for more batched responses before flushing a frame
+BATCH_WINDOW = 0.001
+
 class MCPAdapter:
     def __init__(
         self, 
         llm_client: LLMClient, 
         protocol_registry: ProtocolRegistry,
         host: str = "0.0.0.0", 
-        port: int = 8080
+        port: int = 8080,
+        compression: Optional[str] = None
     ):
         self.llm_client = llm_client
         self.protocol_registry = protocol_registry
         self.host = host
         self.port = port
+        # None or "deflate"; most MCP frames are too small for zlib to pay off
+        self.compression = compression
+        # Open connections; handler() adds and removes them along with their
+        # batch queue and flusher task, which hold the socket as well
         self.connections = set()
+        self.dispatcher = MessageDispatcher()
+        self._list_cache: Optional[Tuple[int, Dict[str, Any]]] = None
+        # Encoded list_protocols results per codec, keyed on registry version
+        self._list_frames: Dict[Codec, Tuple[int, Any]] = {}
+        # Per-connection queues of encoded responses sent with "batch": true
+        self._out_queues: Dict[Any, asyncio.Queue] = {}
         self.handlers = {
             "list_protocols": self.handle_list_protocols,
             "activate_protocol": self.handle_activate_protocol,
@@ -34,6 +56,10 @@ class MCPAdapter:
     
     async def handle_list_protocols(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Handle list_protocols request from MCP"""
+        version = self.protocol_registry.version
+        if self._list_cache is not None and self._list_cache[0] == version:
+            return self._list_cache[1]
+        
         protocols = self.protocol_registry.list_protocols()
         result = []
         
@@ -46,10 +72,12 @@ class MCPAdapter:
                 "config": config
             })
         
-        return {
+        response = {
             "protocols": result,
             "status": "success"
         }
+        self._list_cache = (version, response)
+        return response
     
     async def handle_activate_protocol(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Handle activate_protocol request from MCP"""
@@ -57,15 +85,13 @@ class MCPAdapter:
         if not protocol_name:
             return {"error": "Protocol name is required", "status": "error"}
         
-        protocols = self.protocol_registry.list_protocols()
+        protocol = self.protocol_registry.get(protocol_name)
         
-        if protocol_name not in protocols:
+        if protocol is None:
             return {"error": f"Protocol '{protocol_name}' not found", "status": "error"}
         
-        protocol = protocols[protocol_name]
-        
         if not protocol.is_running():
-            await protocol.start()
+            await self.protocol_registry.start(protocol_name)
         
         return {
             "protocol": {
@@ -82,15 +108,13 @@ class MCPAdapter:
         if not protocol_name:
             return {"error": "Protocol name is required", "status": "error"}
         
-        protocols = self.protocol_registry.list_protocols()
+        protocol = self.protocol_registry.get(protocol_name)
         
-        if protocol_name not in protocols:
+        if protocol is None:
             return {"error": f"Protocol '{protocol_name}' not found", "status": "error"}
         
-        protocol = protocols[protocol_name]
-        
         if protocol.is_running():
-            await protocol.stop()
+            await self.protocol_registry.stop(protocol_name)
         
         return {
             "protocol": {
@@ -114,13 +138,11 @@ class MCPAdapter:
         if not protocol_name:
             return {"error": "Protocol name is required", "status": "error"}
         
-        protocols = self.protocol_registry.list_protocols()
+        protocol = self.protocol_registry.get(protocol_name)
         
-        if protocol_name not in protocols:
+        if protocol is None:
             return {"error": f"Protocol '{protocol_name}' not found", "status": "error"}
         
-        protocol = protocols[protocol_name]
-        
         if not protocol.is_running():
             return {"error": f"Protocol '{protocol_name}' is not active", "status": "error"}
         
@@ -136,8 +158,9 @@ class MCPAdapter:
             message_id = protocol.generate_id()
             message.id = message_id
             
-            # Send message asynchronously
-            asyncio.create_task(protocol.send_message(message))
+            # Hand off to the protocol's bounded send queue
+            if not self.dispatcher.submit(protocol, message):
+                return {"error": f"Protocol '{protocol_name}' send queue is full", "status": "busy"}
             
             return {
                 "message_id": message_id,
@@ -159,88 +182,269 @@ class MCPAdapter:
         if not protocol_name:
             return {"error": "Protocol name is required", "status": "error"}
         
-        protocols = self.protocol_registry.list_protocols()
+        protocol = self.protocol_registry.get(protocol_name)
         
-        if protocol_name not in protocols:
+        if protocol is None:
             return {"error": f"Protocol '{protocol_name}' not found", "status": "error"}
         
-        protocol = protocols[protocol_name]
-        
-        message = Message(
-            content=content,
-            sender="external",
-            protocol=protocol_name,
-            recipient="system",
-            metadata=metadata
-        )
-        
         try:
             # Process message with LLM
-            llm_response = self.llm_client.generate(content)
-            
-            response_message = Message(
-                content=llm_response.text,
-                sender="llm",
-                protocol=protocol_name,
-                recipient=message.sender,
-                metadata={"in_response_to": message.id}
-            )
+            llm_response = await self.llm_client.agenerate(content)
             
+            # Both messages only go out on the wire, so build the serialized
+            # form directly rather than validating Message models first
             return {
-                "original_message": message.dict(),
-                "llm_response": response_message.dict(),
+                "original_message": {
+                    "id": None,
+                    "content": content,
+                    "sender": "external",
+                    "protocol": protocol_name,
+                    "recipient": "system",
+                    "metadata": metadata
+                },
+                "llm_response": {
+                    "id": None,
+                    "content": llm_response.text,
+                    "sender": "llm",
+                    "protocol": protocol_name,
+                    "recipient": "external",
+                    "metadata": {"in_response_to": None}
+                },
                 "status": "success"
             }
         except Exception as e:
             logger.error(f"Error simulating message: {e}")
             return {"error": str(e), "status": "error"}
     
-    async def handle_message(self, websocket, message: str):
+    async def stream_simulate_message(self, websocket: Any, codec: Codec, data: Dict[str, Any]) -> None:
+        """Stream the LLM reply to a simulate_message request as it is generated"""
+        request_id = data.get("id")
+        content = data.get("content")
+        protocol_name = data.get("protocol")
+        
+        error = None
+        if not content:
+            error = "Message content is required"
+        elif not protocol_name:
+            error = "Protocol name is required"
+        elif self.protocol_registry.get(protocol_name) is None:
+            error = f"Protocol '{protocol_name}' not found"
+        
+        if error is not None:
+            await websocket.send(codec.dumps({
+                "id": request_id,
+                "result": {"error": error, "status": "error"}
+            }))
+            return
+        
+        send = websocket.send
+        dumps = codec.dumps
+        stream = self.llm_client.generate_stream(content)
+        try:
+            await send(dumps({"id": request_id, "type": "start"}))
+            while True:
+                # Only LLM failures become error frames; a failed send means the
+                # socket is gone and propagates to the connection handler
+                try:
+                    chunk = await anext(stream)
+                except StopAsyncIteration:
+                    break
+                except Exception as e:
+                    logger.error(f"Error simulating message: {e}")
+                    await send(dumps({"id": request_id, "type": "error", "error": str(e)}))
+                    return
+                await send(dumps({"id": request_id, "type": "chunk", "delta": chunk}))
+            await send(dumps({"id": request_id, "type": "end"}))
+        finally:
+            await stream.aclose()
+    
+    async def encoded_protocol_list(self, codec: Codec) -> Union[str, bytes]:
+        """Return the list_protocols result encoded with codec"""
+        version = self.protocol_registry.version
+        cached = self._list_frames.get(codec)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        
+        encoded = codec.dumps(await self.handle_list_protocols({}))
+        self._list_frames[codec] = (version, encoded)
+        return encoded
+    
+    async def send_response(
+        self, websocket: Any, codec: Codec, response: Dict[str, Any], batch: bool = False
+    ) -> None:
+        """Send a response frame, or queue it for the connection's next batch"""
+        await self.send_frame(websocket, codec.dumps(response), batch)
+    
+    async def send_frame(self, websocket: Any, payload: Union[str, bytes], batch: bool = False) -> None:
+        """Send an encoded frame, or queue it for the connection's next batch"""
+        queue = self._out_queues.get(websocket) if batch else None
+        
+        if queue is None:
+            await websocket.send(payload)
+        else:
+            queue.put_nowait(payload)
+    
+    async def flush_batches(self, websocket: Any, codec: Codec, queue: asyncio.Queue) -> None:
+        """Send queued responses as a single array frame per burst"""
+        while True:
+            batch = [await queue.get()]
+            # Let responses produced in the same burst join this frame
+            await asyncio.sleep(BATCH_WINDOW)
+            while not queue.empty():
+                batch.append(queue.get_nowait())
+            await websocket.send(codec.join(batch))
+    
+    async def handle_message(self, websocket: Any, message: Union[str, bytes]) -> None:
         """Handle incoming MCP message"""
+        codec = codec_for(websocket.subprotocol)
+        if not codec.sniff(message):
+            await websocket.send(codec.invalid_frame)
+            return
+        
+        try:
+            data = codec.loads(message)
+        except (ValueError, TypeError):
+            await websocket.send(codec.invalid_frame)
+            return
+        
+        if not isinstance(data, dict):
+            # Arrays and scalars decode fine but are not requests
+            await websocket.send(codec.invalid_frame)
+            return
+        
+        batch = False
         try:
-            data = json.loads(message)
             action = data.get("action")
+            batch = bool(data.get("batch"))
             
-            if action in self.handlers:
-                result = await self.handlers[action](data)
-                await websocket.send(json.dumps({
+            if action == "list_protocols":
+                # Splice the cached encoded listing instead of re-encoding it
+                result = await self.encoded_protocol_list(codec)
+                await self.send_frame(websocket, codec.wrap_result(data.get("id"), result), batch)
+                return
+            
+            if action == "simulate_message" and data.get("stream"):
+                await self.stream_simulate_message(websocket, codec, data)
+                return
+            
+            handle = self.handlers.get(action)
+            
+            if handle is not None:
+                result = await handle(data)
+                await self.send_response(websocket, codec, {
                     "id": data.get("id"),
                     "result": result
-                }))
+                }, batch)
             else:
-                await websocket.send(json.dumps({
-                    "id": data.get("id"),
-                    "error": f"Unknown action: {action}"
-                }))
-        except json.JSONDecodeError:
-            await websocket.send(json.dumps({
-                "error": "Invalid JSON"
-            }))
+                frame = codec.wrap_error(data.get("id"), f"Unknown action: {action}")
+                await self.send_frame(websocket, frame, batch)
+        except ConnectionClosed:
+            # Nothing can be sent back on a closed socket
+            raise
         except Exception as e:
             logger.error(f"Error handling message: {e}")
-            await websocket.send(json.dumps({
+            await self.send_response(websocket, codec, {
                 "error": str(e)
-            }))
+            }, batch)
     
-    async def handler(self, websocket, path):
+    async def handler(self, websocket: Any, path: Optional[str] = None) -> None:
         """WebSocket connection handler"""
+        codec = codec_for(websocket.subprotocol)
+        queue = asyncio.Queue()
+        self._out_queues[websocket] = queue
+        flusher = asyncio.create_task(self.flush_batches(websocket, codec, queue))
         self.connections.add(websocket)
         try:
             async for message in websocket:
                 await self.handle_message(websocket, message)
+        except ConnectionClosed:
+            pass  # client went away mid-request
         finally:
-            self.connections.remove(websocket)
+            self.connections.discard(websocket)
+            flusher.cancel()
+            del self._out_queues[websocket]
+    
+    async def broadcast(self, message: Dict[str, Any]) -> None:
+        """Send a message to every open connection"""
+        connections = list(self.connections)
+        codecs = {codec_for(ws.subprotocol) for ws in connections}
+        # Encode once per wire format, not once per connection
+        frames = {codec: codec.dumps(message) for codec in codecs}
+        await self._fan_out(connections, frames)
     
-    async def run(self):
+    async def broadcast_protocols(self) -> None:
+        """Push the current protocol listing to every open connection"""
+        connections = list(self.connections)
+        frames = {}
+        for codec in {codec_for(ws.subprotocol) for ws in connections}:
+            # Own envelope, so it cannot be mistaken for the reply to a request
+            frames[codec] = codec.wrap_event("protocols", await self.encoded_protocol_list(codec))
+        await self._fan_out(connections, frames)
+    
+    async def _fan_out(self, connections: List[Any], frames: Dict[Codec, Union[str, bytes]]) -> None:
+        # Send concurrently; one slow or closed connection must not hold up
+        # or cancel the others, so failures are collected rather than raised
+        results = await asyncio.gather(
+            *(ws.send(frames[codec_for(ws.subprotocol)]) for ws in connections),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning(f"Error broadcasting message: {result}")
+    
+    async def close(self) -> None:
+        """Close all open connections, stop the send workers and release the LLM client"""
+        # Snapshot first, closing connections shrinks the set
+        connections = list(self.connections)
+        await asyncio.gather(*(ws.close() for ws in connections), return_exceptions=True)
+        await self.dispatcher.close()
+        await self.llm_client.aclose()
+    
+    def select_subprotocol(self, connection: Any, subprotocols: Sequence[str]) -> Optional[str]:
+        """Pick a supported subprotocol, or plain JSON when the client offers none"""
+        for subprotocol in subprotocols:
+            if subprotocol is not None and subprotocol in CODECS:
+                return subprotocol
+        # The server default rejects clients that offer no subprotocol
+        return None
+    
+    def serve(self) -> Any:
+        """Return the websockets server for this adapter, to be used with async with"""
+        extensions = None
+        if self.compression == "deflate":
+            # Cheap settings: fastest level and a small window keep per-frame cost low
+            extensions = [
+                ServerPerMessageDeflateFactory(
+                    server_max_window_bits=12,
+                    compress_settings={"level": 1, "memLevel": 5}
+                )
+            ]
+        elif self.compression is not None:
+            raise ValueError(f"Unsupported compression: {self.compression}")
+        
+        return websockets.serve(
+            self.handler,
+            self.host,
+            self.port,
+            select_subprotocol=self.select_subprotocol,
+            compression=None,
+            extensions=extensions
+        )
+    
+    async def run(self) -> None:
         """Run the MCP adapter server"""
-        async with websockets.serve(self.handler, self.host, self.port):
+        async with self.serve():
             await asyncio.Future()  # Run forever
 
 def start():
     """Start the MCP adapter"""
+    config = Config.from_env()
+    
+    if uvloop is not None:
+        uvloop.install()
+    
     # Initialize LLM client
-    llm_host = os.environ.get("LLM_HOST", "http://localhost:11434")
-    llm_client = LLMClient(host=llm_host)
+    llm_client = LLMClient(host=config.llm_host)
     
     # Initialize protocol registry
     from protocol_integration.protocols.chat import ChatProtocol
@@ -251,46 +455,50 @@ def start():
     protocol_registry = ProtocolRegistry()
     
     # Register protocols based on environment configuration
-    if os.environ.get("ENABLE_CHAT", "true").lower() == "true":
+    if "chat" in config.enabled:
         protocol_registry.register("chat", ChatProtocol(llm_client))
     
-    if os.environ.get("ENABLE_EMAIL", "false").lower() == "true":
+    if "email" in config.enabled:
         email_config = {
-            "host": os.environ.get("EMAIL_HOST"),
-            "user": os.environ.get("EMAIL_USER"),
-            "password": os.environ.get("EMAIL_PASSWORD")
+            "host": config.email_host,
+            "user": config.email_user,
+            "password": config.email_password
         }
         protocol_registry.register("email", EmailProtocol(llm_client, **email_config))
     
-    if os.environ.get("ENABLE_DISCORD", "false").lower() == "true":
+    if "discord" in config.enabled:
         discord_config = {
-            "token": os.environ.get("DISCORD_TOKEN")
+            "token": config.discord_token
         }
         protocol_registry.register("discord", DiscordProtocol(llm_client, **discord_config))
     
-    if os.environ.get("ENABLE_SLACK", "false").lower() == "true":
+    if "slack" in config.enabled:
         slack_config = {
-            "token": os.environ.get("SLACK_TOKEN")
+            "token": config.slack_token
         }
         protocol_registry.register("slack", SlackProtocol(llm_client, **slack_config))
     
-    # Start protocols that should be auto-started
-    for name, protocol in protocol_registry.list_protocols().items():
-        if os.environ.get(f"AUTOSTART_{name.upper()}", "false").lower() == "true":
-            asyncio.run(protocol.start())
-    
     # Start MCP adapter
-    host = os.environ.get("MCP_HOST", "0.0.0.0")
-    port = int(os.environ.get("MCP_PORT", 8080))
-    
     adapter = MCPAdapter(
         llm_client=llm_client,
         protocol_registry=protocol_registry,
-        host=host,
-        port=port
+        host=config.mcp_host,
+        port=config.mcp_port,
+        compression=config.mcp_compression
     )
     
-    asyncio.run(adapter.run())
+    async def boot():
+        try:
+            # Start protocols that should be auto-started, concurrently and on
+            # the same loop that serves the adapter so their tasks keep running
+            await asyncio.gather(*(
+                protocol_registry.start(name) for name in config.autostart if name in protocol_registry
+            ))
+            await adapter.run()
+        finally:
+            await adapter.close()
+    
+    asyncio.run(boot())
 
 if __name__ == "__main__":
     start()
\ No newline at end of file
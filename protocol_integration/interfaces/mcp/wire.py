@@ -0,0 +1,118 @@
+"""
+wire.py
+"""
+
+# Wire codecs for the MCP adapter. This module holds no adapter state and
+# passes ``mypy --strict``, so it can be compiled on its own with
+# ``mypyc protocol_integration/interfaces/mcp/wire.py``; the adapter imports
+# it the same way whether compiled or not.
+
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import orjson
+
+try:
+    import msgpack  # type: ignore[import-untyped]
+except ImportError:  # binary framing is only offered when msgpack is installed
+    msgpack = None
+
+# WebSocket subprotocol clients request to exchange MessagePack binary frames
+MSGPACK_SUBPROTOCOL = "mcp.msgpack"
+
+class Codec(NamedTuple):
+    """Wire format used on a connection"""
+    loads: Callable[[Any], Any]
+    sniff: Callable[[Any], bool]  # cheap pre-check; False rejects without parsing
+    dumps: Callable[[Any], Any]
+    join: Callable[[List[Any]], Any]
+    wrap_result: Callable[[Any, Any], Any]  # (id, encoded result) -> response frame
+    wrap_error: Callable[[Any, str], Any]  # (id, error message) -> response frame
+    wrap_event: Callable[[str, Any], Any]  # (event type, encoded result) -> pushed frame
+    invalid_frame: Any  # pre-encoded reply to undecodable input
+
+# First characters a JSON object or array frame can start with
+_JSON_OPENERS = frozenset(("{", "[", b"{", b"["))
+
+def _json_sniff(message: Any) -> bool:
+    if message[:1] in _JSON_OPENERS:
+        return True
+    # Leading whitespace is still valid JSON; only then pay for the strip
+    return message.lstrip()[:1] in _JSON_OPENERS
+
+def _json_dumps(obj: Any) -> str:
+    # Decode so JSON keeps going out as text frames
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+def _json_join(parts: List[str]) -> str:
+    return "[" + ",".join(parts) + "]"
+
+def _json_wrap_result(request_id: Any, result: str) -> str:
+    return '{"id":' + _json_dumps(request_id) + ',"result":' + result + "}"
+
+def _json_wrap_error(request_id: Any, error: str) -> str:
+    return '{"id":' + _json_dumps(request_id) + ',"error":' + _json_dumps(error) + "}"
+
+def _json_wrap_event(event: str, result: str) -> str:
+    return '{"type":' + _json_dumps(event) + ',"result":' + result + "}"
+
+def _msgpack_sniff(message: Any) -> bool:
+    # MessagePack is only ever carried in binary frames
+    return isinstance(message, bytes) and len(message) > 0
+
+def _msgpack_packb(obj: Any) -> bytes:
+    packed: bytes = msgpack.packb(obj)
+    return packed
+
+def _msgpack_loads(message: bytes) -> Any:
+    return msgpack.unpackb(message, raw=False)
+
+def _msgpack_join(parts: List[bytes]) -> bytes:
+    # Prefix already packed items with a MessagePack array header
+    count = len(parts)
+    if count < 16:
+        header = bytes((0x90 | count,))
+    elif count < 0x10000:
+        header = b"\xdc" + count.to_bytes(2, "big")
+    else:
+        header = b"\xdd" + count.to_bytes(4, "big")
+    return header + b"".join(parts)
+
+def _msgpack_wrap_result(request_id: Any, result: bytes) -> bytes:
+    # fixmap of 2 entries, then the fixstr keys "id" and "result"
+    return b"\x82\xa2id" + _msgpack_packb(request_id) + b"\xa6result" + result
+
+def _msgpack_wrap_error(request_id: Any, error: str) -> bytes:
+    # fixmap of 2 entries, then the fixstr keys "id" and "error"
+    return b"\x82\xa2id" + _msgpack_packb(request_id) + b"\xa5error" + _msgpack_packb(error)
+
+def _msgpack_wrap_event(event: str, result: bytes) -> bytes:
+    # fixmap of 2 entries, then the fixstr keys "type" and "result"
+    return b"\x82\xa4type" + _msgpack_packb(event) + b"\xa6result" + result
+
+JSON_CODEC = Codec(
+    orjson.loads,
+    _json_sniff,
+    _json_dumps,
+    _json_join,
+    _json_wrap_result,
+    _json_wrap_error,
+    _json_wrap_event,
+    _json_dumps({"error": "Invalid JSON"})
+)
+
+CODECS: Dict[Optional[str], Codec] = {None: JSON_CODEC}
+if msgpack is not None:
+    CODECS[MSGPACK_SUBPROTOCOL] = Codec(
+        _msgpack_loads,
+        _msgpack_sniff,
+        msgpack.packb,
+        _msgpack_join,
+        _msgpack_wrap_result,
+        _msgpack_wrap_error,
+        _msgpack_wrap_event,
+        msgpack.packb({"error": "Invalid MessagePack"})
+    )
+
+def codec_for(subprotocol: Optional[str]) -> Codec:
+    """Return the codec for a negotiated WebSocket subprotocol"""
+    return CODECS.get(subprotocol, JSON_CODEC)
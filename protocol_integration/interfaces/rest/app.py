@@ -1,14 +1,17 @@
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
+import orjson
 import uvicorn
-import os
 import asyncio
 
 from protocol_integration.core.protocol import ProtocolRegistry
 from protocol_integration.core.message import Message
+from protocol_integration.core.routing import MessageDispatcher
 from protocol_integration.llm.client import LLMClient
+from protocol_integration.utils.config import Config
 from protocol_integration.protocols.chat import ChatProtocol
 from protocol_integration.protocols.email import EmailProtocol
 from protocol_integration.protocols.discord import DiscordProtocol
@@ -33,6 +36,12 @@ app.add_middleware(
 llm_client = None
 protocol_registry = None
 
+# Bounded per-protocol queues for POST /send
+dispatcher = MessageDispatcher()
+
+# (registry, registry version, encoded body) for GET /protocols
+_protocols_cache = None
+
 class ProtocolStatus(BaseModel):
     name: str
     status: str
@@ -57,48 +66,54 @@ def get_registry():
 async def startup_event():
     global llm_client, protocol_registry
     
+    config = Config.from_env()
+    
     # Initialize LLM client
-    llm_host = os.environ.get("LLM_HOST", "http://localhost:11434")
-    llm_client = LLMClient(host=llm_host)
+    llm_client = LLMClient(host=config.llm_host)
     
     # Initialize protocol registry
     protocol_registry = ProtocolRegistry()
     
     # Register protocols based on environment configuration
-    if os.environ.get("ENABLE_CHAT", "true").lower() == "true":
+    if "chat" in config.enabled:
         protocol_registry.register("chat", ChatProtocol(llm_client))
     
-    if os.environ.get("ENABLE_EMAIL", "false").lower() == "true":
+    if "email" in config.enabled:
         email_config = {
-            "host": os.environ.get("EMAIL_HOST"),
-            "user": os.environ.get("EMAIL_USER"),
-            "password": os.environ.get("EMAIL_PASSWORD")
+            "host": config.email_host,
+            "user": config.email_user,
+            "password": config.email_password
         }
         protocol_registry.register("email", EmailProtocol(llm_client, **email_config))
     
-    if os.environ.get("ENABLE_DISCORD", "false").lower() == "true":
+    if "discord" in config.enabled:
         discord_config = {
-            "token": os.environ.get("DISCORD_TOKEN")
+            "token": config.discord_token
         }
         protocol_registry.register("discord", DiscordProtocol(llm_client, **discord_config))
     
-    if os.environ.get("ENABLE_SLACK", "false").lower() == "true":
+    if "slack" in config.enabled:
         slack_config = {
-            "token": os.environ.get("SLACK_TOKEN")
+            "token": config.slack_token
         }
         protocol_registry.register("slack", SlackProtocol(llm_client, **slack_config))
     
-    # Start protocols that should be auto-started
-    for name, protocol in protocol_registry.list_protocols().items():
-        if os.environ.get(f"AUTOSTART_{name.upper()}", "false").lower() == "true":
-            await protocol.start()
+    # Start protocols that should be auto-started, concurrently
+    await asyncio.gather(*(
+        protocol_registry.start(name) for name in config.autostart if name in protocol_registry
+    ))
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    await dispatcher.close()
+    
+    if llm_client:
+        await llm_client.aclose()
+    
     if protocol_registry:
         for name, protocol in protocol_registry.list_protocols().items():
             if protocol.is_running():
-                await protocol.stop()
+                await protocol_registry.stop(name)
 
 @app.get("/health", summary="Health check endpoint")
 async def health_check():
@@ -108,15 +123,23 @@ async def health_check():
 @app.get("/protocols", response_model=List[ProtocolStatus], summary="List available protocols")
 async def list_protocols(registry: ProtocolRegistry = Depends(get_registry)):
     """List all available protocols and their status"""
-    protocols = registry.list_protocols()
-    result = []
+    global _protocols_cache
     
-    for name, protocol in protocols.items():
-        status = "active" if protocol.is_running() else "inactive"
-        config = protocol.get_config()
-        result.append(ProtocolStatus(name=name, status=status, config=config))
+    version = registry.version
+    cached = _protocols_cache
+    if cached is None or cached[0] is not registry or cached[1] != version:
+        protocols = registry.list_protocols()
+        result = []
+        
+        for name, protocol in protocols.items():
+            status = "active" if protocol.is_running() else "inactive"
+            config = protocol.get_config()
+            result.append({"name": name, "status": status, "config": config})
+        
+        cached = _protocols_cache = (registry, version, orjson.dumps(result, option=orjson.OPT_NON_STR_KEYS))
     
-    return result
+    # Pre-encoded body, so FastAPI skips validation and serialization
+    return Response(content=cached[2], media_type="application/json")
 
 @app.post("/protocols/{protocol_name}/activate", response_model=ProtocolStatus, summary="Activate a protocol")
 async def activate_protocol(
@@ -124,15 +147,13 @@ async def activate_protocol(
     registry: ProtocolRegistry = Depends(get_registry)
 ):
     """Activate a specific protocol"""
-    protocols = registry.list_protocols()
+    protocol = registry.get(protocol_name)
     
-    if protocol_name not in protocols:
+    if protocol is None:
         raise HTTPException(status_code=404, detail=f"Protocol '{protocol_name}' not found")
     
-    protocol = protocols[protocol_name]
-    
     if not protocol.is_running():
-        await protocol.start()
+        await registry.start(protocol_name)
     
     return ProtocolStatus(
         name=protocol_name,
@@ -146,23 +167,32 @@ async def deactivate_protocol(
     registry: ProtocolRegistry = Depends(get_registry)
 ):
     """Deactivate a specific protocol"""
-    protocols = registry.list_protocols()
+    protocol = registry.get(protocol_name)
+    
+    if protocol is None:
+        raise HTTPException(status_code=404, detail=f"Protocol '{protocol_name}' not found")
+    
+    if protocol.is_running():
+        await registry.stop(protocol_name)
+    
+    return ProtocolStatus(
+        name=protocol_name,
+        status="inactive",
+        config=protocol.get_config()
+    )
 
 
 @app.post("/send", response_model=MessageResponse, summary="Send a message")
 async def send_message(
         request: MessageRequest,
-        background_tasks: BackgroundTasks,
         registry: ProtocolRegistry = Depends(get_registry)
 ):
     """Send a message through a specific protocol"""
-    protocols = registry.list_protocols()
+    protocol = registry.get(request.protocol)
 
-    if request.protocol not in protocols:
+    if protocol is None:
         raise HTTPException(status_code=404, detail=f"Protocol '{request.protocol}' not found")
 
-    protocol = protocols[request.protocol]
-
     if not protocol.is_running():
         raise HTTPException(status_code=400, detail=f"Protocol '{request.protocol}' is not active")
 
@@ -175,65 +205,112 @@ async def send_message(
     )
 
     try:
-        # Send message asynchronously
+        # Hand off to the protocol's bounded send queue
         message_id = protocol.generate_id()
-        background_tasks.add_task(protocol.send_message, message)
+        if not dispatcher.submit(protocol, message):
+            raise HTTPException(status_code=503, detail=f"Protocol '{request.protocol}' send queue is full")
 
         return MessageResponse(
             id=message_id,
             status="queued",
             message="Message queued for delivery"
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/simulate", response_model=Dict[str, Any], summary="Simulate receiving a message")
+@app.post(
+    "/simulate",
+    response_model=Dict[str, Any],
+    response_class=ORJSONResponse,
+    summary="Simulate receiving a message"
+)
 async def simulate_message(
         request: MessageRequest,
         registry: ProtocolRegistry = Depends(get_registry)
 ):
     """Simulate receiving a message through a specific protocol"""
-    protocols = registry.list_protocols()
+    protocol = registry.get(request.protocol)
 
-    if request.protocol not in protocols:
+    if protocol is None:
         raise HTTPException(status_code=404, detail=f"Protocol '{request.protocol}' not found")
 
-    protocol = protocols[request.protocol]
-
-    message = Message(
-        content=request.content,
-        sender="external",
-        protocol=request.protocol,
-        recipient="system",
-        metadata=request.metadata
-    )
-
     try:
         # Process message with LLM
-        llm_response = llm_client.generate(request.content)
-
-        response_message = Message(
-            content=llm_response.text,
-            sender="llm",
-            protocol=request.protocol,
-            recipient=message.sender,
-            metadata={"in_response_to": message.id}
-        )
+        llm_response = await llm_client.agenerate(request.content)
+
+        # Encoded straight from dicts, no Message validation needed
+        return ORJSONResponse({
+            "original_message": {
+                "id": None,
+                "content": request.content,
+                "sender": "external",
+                "protocol": request.protocol,
+                "recipient": "system",
+                "metadata": request.metadata
+            },
+            "llm_response": {
+                "id": None,
+                "content": llm_response.text,
+                "sender": "llm",
+                "protocol": request.protocol,
+                "recipient": "external",
+                "metadata": {"in_response_to": None}
+            }
+        })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        return {
-            "original_message": message.dict(),
-            "llm_response": response_message.dict()
-        }
+
+@app.post("/simulate/stream", summary="Simulate receiving a message with a streamed response")
+async def simulate_message_stream(
+        request: MessageRequest,
+        registry: ProtocolRegistry = Depends(get_registry)
+):
+    """Simulate receiving a message, streaming the LLM response as plain text"""
+    if not request.content:
+        raise HTTPException(status_code=400, detail="Message content is required")
+
+    if registry.get(request.protocol) is None:
+        raise HTTPException(status_code=404, detail=f"Protocol '{request.protocol}' not found")
+
+    # Wait for the first chunk before answering, so a failing LLM call still
+    # gets a proper error status instead of a 200 that is cut off
+    stream = llm_client.generate_stream(request.content)
+    try:
+        first = await anext(stream)
+    except StopAsyncIteration:
+        first = ""
     except Exception as e:
+        await stream.aclose()
         raise HTTPException(status_code=500, detail=str(e))
 
+    async def body():
+        yield first
+        try:
+            async for chunk in stream:
+                yield chunk
+        except Exception as e:
+            # Headers are already sent; end the body with a marker instead
+            yield f"\n[error: {e}]\n"
+        finally:
+            await stream.aclose()
+
+    return StreamingResponse(body(), media_type="text/plain")
+
 
 def start():
     """Start the FastAPI server"""
-    host = os.environ.get("HOST", "0.0.0.0")
-    port = int(os.environ.get("PORT", 8000))
-    uvicorn.run("protocol_integration.interfaces.rest.app:app", host=host, port=port, reload=True)
+    config = Config.from_env()
+    uvicorn.run(
+        "protocol_integration.interfaces.rest.app:app",
+        host=config.host,
+        port=config.port,
+        # Reloading runs the app under a supervisor process, so keep it for development
+        reload=config.reload
+    )
 
 
 if __name__ == "__main__":
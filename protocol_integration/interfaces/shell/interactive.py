@@ -2,6 +2,7 @@
 import cmd
 import typer
 import asyncio
+import threading
 from rich.console import Console
 from rich.table import Table
 from typing import List, Optional
@@ -22,7 +23,22 @@ class ProtocolShell(cmd.Cmd):
         self.llm_client = llm_client
         self.protocol_registry = protocol_registry
         self.active_protocol = None
+        # One long-lived loop, so protocol tasks keep running between prompts
+        self.loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._loop_thread.start()
     
+    def _run(self, coro):
+        """Run a coroutine on the shell's event loop and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    async def _cancel_pending(self):
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
     def do_protocols(self, arg):
         """List available protocols"""
         protocols = self.protocol_registry.list_protocols()
@@ -47,14 +63,13 @@ class ProtocolShell(cmd.Cmd):
             console.print("[yellow]Please provide a protocol name[/yellow]")
             return
         
-        protocols = self.protocol_registry.list_protocols()
-        if arg not in protocols:
+        protocol = self.protocol_registry.get(arg)
+        if protocol is None:
             console.print(f"[red]Protocol '{arg}' not found[/red]")
             return
         
-        protocol = protocols[arg]
         if not protocol.is_running():
-            asyncio.run(protocol.start())
+            self._run(self.protocol_registry.start(arg))
             console.print(f"[green]Protocol '{arg}' activated[/green]")
         else:
             console.print(f"[yellow]Protocol '{arg}' is already active[/yellow]")
@@ -67,14 +82,13 @@ class ProtocolShell(cmd.Cmd):
             console.print("[yellow]Please provide a protocol name[/yellow]")
             return
         
-        protocols = self.protocol_registry.list_protocols()
-        if arg not in protocols:
+        protocol = self.protocol_registry.get(arg)
+        if protocol is None:
             console.print(f"[red]Protocol '{arg}' not found[/red]")
             return
         
-        protocol = protocols[arg]
         if protocol.is_running():
-            asyncio.run(protocol.stop())
+            self._run(self.protocol_registry.stop(arg))
             console.print(f"[green]Protocol '{arg}' deactivated[/green]")
         else:
             console.print(f"[yellow]Protocol '{arg}' is already inactive[/yellow]")
@@ -92,8 +106,7 @@ class ProtocolShell(cmd.Cmd):
             console.print("[yellow]Please provide a message[/yellow]")
             return
         
-        protocols = self.protocol_registry.list_protocols()
-        protocol = protocols[self.active_protocol]
+        protocol = self.protocol_registry.get(self.active_protocol)
         
         message = Message(
             content=arg,
@@ -102,7 +115,7 @@ class ProtocolShell(cmd.Cmd):
         )
         
         try:
-            asyncio.run(protocol.send_message(message))
+            self._run(protocol.send_message(message))
             console.print(f"[green]Message sent through '{self.active_protocol}'[/green]")
         except Exception as e:
             console.print(f"[red]Error sending message: {e}[/red]")
@@ -117,23 +130,9 @@ class ProtocolShell(cmd.Cmd):
             console.print("[yellow]Please provide a message[/yellow]")
             return
         
-        protocols = self.protocol_registry.list_protocols()
-        protocol = protocols[self.active_protocol]
-        
-        message = Message(
-            content=arg,
-            sender="external",
-            protocol=self.active_protocol
-        )
-        
         try:
             # Process message with LLM and get response
             llm_response = self.llm_client.generate(arg)
-            response_message = Message(
-                content=llm_response.text,
-                sender="llm",
-                protocol=self.active_protocol
-            )
             
             console.print(f"[blue]Simulated incoming message: {arg}[/blue]")
             console.print(f"[green]LLM response: {llm_response.text}[/green]")
@@ -142,6 +141,18 @@ class ProtocolShell(cmd.Cmd):
     
     def do_exit(self, arg):
         """Exit the shell"""
+        for name, protocol in self.protocol_registry.list_protocols().items():
+            if protocol.is_running():
+                try:
+                    self._run(self.protocol_registry.stop(name))
+                except Exception as e:
+                    console.print(f"[red]Error stopping protocol '{name}': {e}[/red]")
+
+        # Cancel whatever the protocols left behind before the loop goes away
+        self._run(self._cancel_pending())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._loop_thread.join()
+        self.loop.close()
         return True
     
     # Aliases
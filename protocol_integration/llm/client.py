@@ -2,3 +2,72 @@
 client.py
 """
 
+import json
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+import httpx
+
+
+@dataclass
+class LLMResponse:
+    text: str
+
+
+class LLMClient:
+    """Client for an Ollama-compatible generation API"""
+
+    def __init__(self, host: str = "http://localhost:11434", model: str = "llama2", timeout: float = 120.0):
+        self.host = host.rstrip("/")
+        self.model = model
+        self.timeout = timeout
+        self._async_client: Optional[httpx.AsyncClient] = None
+
+    def _http(self) -> httpx.AsyncClient:
+        # Shared so async calls reuse pooled connections to the LLM host
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(timeout=self.timeout)
+        return self._async_client
+
+    def generate(self, prompt: str) -> LLMResponse:
+        """Generate the complete response for a prompt"""
+        response = httpx.post(
+            f"{self.host}/api/generate",
+            json={"model": self.model, "prompt": prompt, "stream": False},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return LLMResponse(text=response.json().get("response", ""))
+
+    async def agenerate(self, prompt: str) -> LLMResponse:
+        """Generate the complete response for a prompt without blocking the event loop"""
+        response = await self._http().post(
+            f"{self.host}/api/generate",
+            json={"model": self.model, "prompt": prompt, "stream": False},
+        )
+        response.raise_for_status()
+        return LLMResponse(text=response.json().get("response", ""))
+
+    async def generate_stream(self, prompt: str) -> AsyncIterator[str]:
+        """Yield response text for a prompt chunk by chunk as it is generated"""
+        async with self._http().stream(
+            "POST",
+            f"{self.host}/api/generate",
+            json={"model": self.model, "prompt": prompt, "stream": True},
+        ) as response:
+            response.raise_for_status()
+            # Ollama streams one JSON object per line
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    break
+
+    async def aclose(self) -> None:
+        """Close pooled connections used by the async methods"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
@@ -0,0 +1,74 @@
+"""
+config.py
+"""
+
+import os
+from dataclasses import dataclass
+from typing import FrozenSet, Optional
+
+PROTOCOL_NAMES = ("chat", "email", "discord", "slack")
+
+# Every environment variable Config.from_env reads
+ENV_VARS = (
+    "LLM_HOST",
+    *(f"ENABLE_{name.upper()}" for name in PROTOCOL_NAMES),
+    *(f"AUTOSTART_{name.upper()}" for name in PROTOCOL_NAMES),
+    "EMAIL_HOST",
+    "EMAIL_USER",
+    "EMAIL_PASSWORD",
+    "DISCORD_TOKEN",
+    "SLACK_TOKEN",
+    "HOST",
+    "PORT",
+    "RELOAD",
+    "MCP_HOST",
+    "MCP_PORT",
+    "MCP_COMPRESSION",
+)
+
+
+def _flag(name: str, default: str = "false") -> bool:
+    return os.environ.get(name, default).lower() == "true"
+
+
+@dataclass(frozen=True, slots=True)
+class Config:
+    """Settings read once from the environment at startup"""
+    llm_host: str = "http://localhost:11434"
+    enabled: FrozenSet[str] = frozenset({"chat"})
+    autostart: FrozenSet[str] = frozenset()
+    email_host: Optional[str] = None
+    email_user: Optional[str] = None
+    email_password: Optional[str] = None
+    discord_token: Optional[str] = None
+    slack_token: Optional[str] = None
+    host: str = "0.0.0.0"
+    port: int = 8000
+    reload: bool = False
+    mcp_host: str = "0.0.0.0"
+    mcp_port: int = 8080
+    mcp_compression: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> "Config":
+        """Build a Config from the current environment"""
+        env = os.environ
+        return cls(
+            llm_host=env.get("LLM_HOST", "http://localhost:11434"),
+            enabled=frozenset(
+                name for name in PROTOCOL_NAMES
+                if _flag(f"ENABLE_{name.upper()}", "true" if name == "chat" else "false")
+            ),
+            autostart=frozenset(name for name in PROTOCOL_NAMES if _flag(f"AUTOSTART_{name.upper()}")),
+            email_host=env.get("EMAIL_HOST"),
+            email_user=env.get("EMAIL_USER"),
+            email_password=env.get("EMAIL_PASSWORD"),
+            discord_token=env.get("DISCORD_TOKEN"),
+            slack_token=env.get("SLACK_TOKEN"),
+            host=env.get("HOST", "0.0.0.0"),
+            port=int(env.get("PORT", 8000)),
+            reload=_flag("RELOAD"),
+            mcp_host=env.get("MCP_HOST", "0.0.0.0"),
+            mcp_port=int(env.get("MCP_PORT", 8080)),
+            mcp_compression=env.get("MCP_COMPRESSION") or None,
+        )
@@ -0,0 +1,44 @@
+"""
+conftest.py
+"""
+
+# core.message and the protocols package are still placeholders, so the
+# interface modules cannot be imported as they are. Provide minimal
+# stand-ins for the names they import; real implementations win as soon
+# as they exist.
+
+import importlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+
+@dataclass
+class Message:
+    content: str
+    sender: str
+    protocol: str
+    recipient: Optional[str] = None
+    metadata: Optional[Dict[str, Any]] = field(default_factory=dict)
+    id: Optional[str] = None
+
+
+class PlaceholderProtocol:
+    def __init__(self, llm_client, **config):
+        self.llm_client = llm_client
+        self.config = config
+
+
+def _provide(module_name, name, obj):
+    module = importlib.import_module(module_name)
+    if not hasattr(module, name):
+        setattr(module, name, obj)
+
+
+_provide("protocol_integration.core.message", "Message", Message)
+for _module, _name in (
+    ("chat", "ChatProtocol"),
+    ("email", "EmailProtocol"),
+    ("discord", "DiscordProtocol"),
+    ("slack", "SlackProtocol"),
+):
+    _provide(f"protocol_integration.protocols.{_module}", _name, type(_name, (PlaceholderProtocol,), {}))
@@ -2,3 +2,85 @@
 test_base_protocol.py
 """
 
+import asyncio
+
+import pytest
+
+from protocol_integration.core.protocol import ProtocolRegistry
+
+
+class FakeProtocol:
+    def __init__(self, fail=False):
+        self.running = False
+        self.fail = fail
+
+    def is_running(self):
+        return self.running
+
+    async def start(self):
+        if self.fail:
+            raise RuntimeError("start failed")
+        self.running = True
+
+    async def stop(self):
+        self.running = False
+
+
+def test_register_get_and_contains():
+    registry = ProtocolRegistry()
+    protocol = FakeProtocol()
+    registry.register("chat", protocol)
+
+    assert registry.get("chat") is protocol
+    assert registry.get("email") is None
+    assert "chat" in registry
+    assert "email" not in registry
+
+
+def test_list_protocols_returns_a_copy():
+    registry = ProtocolRegistry()
+    registry.register("chat", FakeProtocol())
+
+    protocols = registry.list_protocols()
+    protocols.pop("chat")
+
+    assert "chat" in registry
+
+
+def test_version_bumps_on_register_and_unregister():
+    registry = ProtocolRegistry()
+    assert registry.version == 0
+
+    registry.register("chat", FakeProtocol())
+    assert registry.version == 1
+
+    registry.unregister("chat")
+    assert registry.version == 2
+
+    # Unregistering an unknown name changes nothing
+    registry.unregister("chat")
+    assert registry.version == 2
+
+
+def test_version_bumps_on_start_and_stop():
+    registry = ProtocolRegistry()
+    protocol = FakeProtocol()
+    registry.register("chat", protocol)
+    version = registry.version
+
+    asyncio.run(registry.start("chat"))
+    assert protocol.is_running()
+    assert registry.version == version + 1
+
+    asyncio.run(registry.stop("chat"))
+    assert not protocol.is_running()
+    assert registry.version == version + 2
+
+
+def test_version_bumps_even_when_start_fails():
+    registry = ProtocolRegistry()
+    registry.register("chat", FakeProtocol(fail=True))
+    version = registry.version
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(registry.start("chat"))
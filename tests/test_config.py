@@ -0,0 +1,71 @@
+"""
+test_config.py
+"""
+
+import pytest
+
+from protocol_integration.utils import config as config_module
+from protocol_integration.utils.config import ENV_VARS, Config
+
+
+@pytest.fixture
+def clean_env(monkeypatch):
+    for key in ENV_VARS:
+        monkeypatch.delenv(key, raising=False)
+    return monkeypatch
+
+
+class RecordingEnviron(dict):
+    def __init__(self):
+        super().__init__()
+        self.read = set()
+
+    def get(self, key, default=None):
+        self.read.add(key)
+        return super().get(key, default)
+
+
+def test_env_vars_lists_everything_from_env_reads(monkeypatch):
+    environ = RecordingEnviron()
+    monkeypatch.setattr(config_module.os, "environ", environ)
+
+    Config.from_env()
+
+    assert environ.read == set(ENV_VARS)
+
+
+def test_config_defaults(clean_env):
+    config = Config.from_env()
+
+    assert config == Config()
+    assert config.enabled == frozenset({"chat"})
+    assert config.autostart == frozenset()
+    assert config.port == 8000
+    assert config.mcp_port == 8080
+    assert config.reload is False
+    assert config.mcp_compression is None
+
+
+def test_config_reads_environment(clean_env):
+    clean_env.setenv("ENABLE_CHAT", "false")
+    clean_env.setenv("ENABLE_SLACK", "TRUE")
+    clean_env.setenv("AUTOSTART_SLACK", "true")
+    clean_env.setenv("SLACK_TOKEN", "xoxb")
+    clean_env.setenv("MCP_PORT", "9000")
+    clean_env.setenv("RELOAD", "True")
+    clean_env.setenv("MCP_COMPRESSION", "deflate")
+
+    config = Config.from_env()
+
+    assert config.enabled == frozenset({"slack"})
+    assert config.autostart == frozenset({"slack"})
+    assert config.slack_token == "xoxb"
+    assert config.mcp_port == 9000
+    assert config.reload is True
+    assert config.mcp_compression == "deflate"
+
+
+def test_config_is_frozen(clean_env):
+    config = Config.from_env()
+    with pytest.raises(AttributeError):
+        config.port = 1
@@ -2,3 +2,433 @@
 test_mcp.py
 """
 
+import asyncio
+
+import orjson
+import pytest
+import websockets
+from websockets.exceptions import ConnectionClosedOK
+
+from protocol_integration.core.protocol import ProtocolRegistry
+from protocol_integration.interfaces.mcp.adapter import BATCH_WINDOW, MCPAdapter
+from protocol_integration.interfaces.mcp.wire import (
+    JSON_CODEC,
+    MSGPACK_SUBPROTOCOL,
+    codec_for,
+)
+
+REQUEST_IDS = [1, "abc", None, 'quote"id']
+
+
+def _msgpack_codec():
+    msgpack = pytest.importorskip("msgpack")
+    return msgpack, codec_for(MSGPACK_SUBPROTOCOL)
+
+
+def test_codec_for_defaults_to_json():
+    assert codec_for(None) is JSON_CODEC
+    assert codec_for("unknown") is JSON_CODEC
+
+
+def test_json_frames_are_text():
+    assert isinstance(JSON_CODEC.dumps({"a": 1}), str)
+    assert orjson.loads(JSON_CODEC.invalid_frame) == {"error": "Invalid JSON"}
+
+
+@pytest.mark.parametrize("request_id", REQUEST_IDS)
+def test_json_wrap_result_round_trips(request_id):
+    result = {"protocols": [{"name": "chat"}], "status": "success"}
+    frame = JSON_CODEC.wrap_result(request_id, JSON_CODEC.dumps(result))
+    assert orjson.loads(frame) == {"id": request_id, "result": result}
+
+
+@pytest.mark.parametrize("request_id", REQUEST_IDS)
+def test_json_wrap_error_escapes_message(request_id):
+    error = 'Unknown action: "x"\n'
+    frame = JSON_CODEC.wrap_error(request_id, error)
+    assert orjson.loads(frame) == {"id": request_id, "error": error}
+
+
+def test_json_wrap_event_round_trips():
+    result = {"protocols": [], "status": "success"}
+    frame = JSON_CODEC.wrap_event("protocols", JSON_CODEC.dumps(result))
+    assert orjson.loads(frame) == {"type": "protocols", "result": result}
+
+
+@pytest.mark.parametrize("count", [0, 1, 3])
+def test_json_join_builds_array(count):
+    items = [{"id": i} for i in range(count)]
+    frame = JSON_CODEC.join([JSON_CODEC.dumps(item) for item in items])
+    assert orjson.loads(frame) == items
+
+
+def test_msgpack_frames_are_binary():
+    msgpack, codec = _msgpack_codec()
+    assert isinstance(codec.dumps({"a": 1}), bytes)
+    assert msgpack.unpackb(codec.invalid_frame) == {"error": "Invalid MessagePack"}
+    assert codec.loads(msgpack.packb({"action": "list_protocols"})) == {"action": "list_protocols"}
+
+
+@pytest.mark.parametrize("request_id", REQUEST_IDS)
+def test_msgpack_wrap_result_round_trips(request_id):
+    msgpack, codec = _msgpack_codec()
+    result = {"protocols": [{"name": "chat"}], "status": "success"}
+    frame = codec.wrap_result(request_id, codec.dumps(result))
+    assert frame == msgpack.packb({"id": request_id, "result": result})
+    assert msgpack.unpackb(frame) == {"id": request_id, "result": result}
+
+
+@pytest.mark.parametrize("request_id", REQUEST_IDS)
+def test_msgpack_wrap_error_round_trips(request_id):
+    msgpack, codec = _msgpack_codec()
+    frame = codec.wrap_error(request_id, "Unknown action: x")
+    assert msgpack.unpackb(frame) == {"id": request_id, "error": "Unknown action: x"}
+
+
+def test_msgpack_wrap_event_round_trips():
+    msgpack, codec = _msgpack_codec()
+    result = {"protocols": [], "status": "success"}
+    frame = codec.wrap_event("protocols", codec.dumps(result))
+    assert msgpack.unpackb(frame) == {"type": "protocols", "result": result}
+
+
+# Array header sizes switch at 16 (fixarray -> array16) and 65536 (-> array32)
+@pytest.mark.parametrize("count", [0, 1, 15, 16, 65535, 65536])
+def test_msgpack_join_builds_array(count):
+    msgpack, codec = _msgpack_codec()
+    items = list(range(count))
+    frame = codec.join([codec.dumps(item) for item in items])
+    assert frame == msgpack.packb(items)
+    assert msgpack.unpackb(frame) == items
+
+
+@pytest.mark.parametrize("message", ['{"a": 1}', "[1]", b'{"a": 1}', b"[1]", ' \n\t{"a": 1}', b"  [1]"])
+def test_json_sniff_accepts_objects_and_arrays(message):
+    assert JSON_CODEC.sniff(message)
+
+
+@pytest.mark.parametrize("message", ["", b"", "   ", "abc", "42", '"str"', b"\x00\x01", b"\x82\xa2id"])
+def test_json_sniff_rejects_other_frames(message):
+    assert not JSON_CODEC.sniff(message)
+
+
+def test_msgpack_sniff_accepts_only_binary_frames():
+    msgpack, codec = _msgpack_codec()
+    assert codec.sniff(msgpack.packb({"a": 1}))
+    assert not codec.sniff(b"")
+    assert not codec.sniff('{"a": 1}')
+
+
+class FakeProtocol:
+    def __init__(self):
+        self.running = False
+
+    def is_running(self):
+        return self.running
+
+    def get_config(self):
+        return {}
+
+    async def start(self):
+        self.running = True
+
+    async def stop(self):
+        self.running = False
+
+
+class FakeStream:
+    """generate_stream stand-in that raises after yielding ``fail_after`` chunks"""
+
+    def __init__(self, chunks, fail_after=None):
+        self.chunks = list(chunks)
+        self.fail_after = fail_after
+        self.yielded = 0
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.fail_after is not None and self.yielded == self.fail_after:
+            raise RuntimeError("llm down")
+        if self.yielded == len(self.chunks):
+            raise StopAsyncIteration
+        self.yielded += 1
+        return self.chunks[self.yielded - 1]
+
+    async def aclose(self):
+        self.closed = True
+
+
+class FakeLLMClient:
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def generate_stream(self, prompt):
+        return self.stream
+
+    async def aclose(self):
+        pass
+
+
+class FakeWebSocket:
+    def __init__(self, subprotocol=None):
+        self.subprotocol = subprotocol
+        self.sent = []
+        self._incoming = asyncio.Queue()
+
+    async def send(self, frame):
+        self.sent.append(frame)
+
+    def feed(self, *frames):
+        for frame in frames:
+            self._incoming.put_nowait(frame)
+
+    def disconnect(self):
+        self._incoming.put_nowait(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        frame = await self._incoming.get()
+        if frame is None:
+            raise StopAsyncIteration
+        return frame
+
+
+def make_adapter(llm_client=None, **kwargs):
+    registry = ProtocolRegistry()
+    registry.register("chat", FakeProtocol())
+    return MCPAdapter(llm_client or FakeLLMClient(), registry, **kwargs)
+
+
+async def _converse(adapter, frame, **connect_kwargs):
+    async with adapter.serve() as server:
+        port = server.sockets[0].getsockname()[1]
+        async with websockets.connect(f"ws://127.0.0.1:{port}", **connect_kwargs) as ws:
+            await ws.send(frame)
+            return ws.subprotocol, await ws.recv()
+
+
+def test_select_subprotocol_falls_back_to_json():
+    adapter = make_adapter()
+
+    assert adapter.select_subprotocol(None, []) is None
+    assert adapter.select_subprotocol(None, ["other"]) is None
+
+
+def test_server_accepts_clients_without_subprotocol():
+    adapter = make_adapter(host="127.0.0.1", port=0)
+    request = orjson.dumps({"id": 1, "action": "list_protocols"}).decode()
+
+    subprotocol, reply = asyncio.run(_converse(adapter, request))
+
+    assert subprotocol is None
+    assert orjson.loads(reply)["result"]["protocols"][0]["name"] == "chat"
+
+
+def test_server_negotiates_msgpack():
+    msgpack = pytest.importorskip("msgpack")
+    adapter = make_adapter(host="127.0.0.1", port=0)
+    request = msgpack.packb({"id": 1, "action": "list_protocols"})
+
+    subprotocol, reply = asyncio.run(
+        _converse(adapter, request, subprotocols=[MSGPACK_SUBPROTOCOL])
+    )
+
+    assert subprotocol == MSGPACK_SUBPROTOCOL
+    assert msgpack.unpackb(reply)["result"]["protocols"][0]["name"] == "chat"
+
+
+@pytest.mark.parametrize("message", ["[1,2]", "[]", " [{}]"])
+def test_handle_message_rejects_json_arrays(message):
+    adapter = make_adapter()
+    ws = FakeWebSocket()
+
+    asyncio.run(adapter.handle_message(ws, message))
+
+    assert ws.sent == [JSON_CODEC.invalid_frame]
+
+
+@pytest.mark.parametrize("payload", [42, "str", [1, 2], None])
+def test_handle_message_rejects_msgpack_non_maps(payload):
+    msgpack, codec = _msgpack_codec()
+    adapter = make_adapter()
+    ws = FakeWebSocket(MSGPACK_SUBPROTOCOL)
+
+    asyncio.run(adapter.handle_message(ws, msgpack.packb(payload)))
+
+    assert ws.sent == [codec.invalid_frame]
+
+
+def _request(action, request_id, **fields):
+    return orjson.dumps({"action": action, "id": request_id, **fields}).decode()
+
+
+async def _serve_connection(adapter, ws, *bursts):
+    """Run handler() on ws, feeding each burst of frames after the last one flushed"""
+    connection = asyncio.create_task(adapter.handler(ws))
+    for burst in bursts:
+        ws.feed(*burst)
+        await asyncio.sleep(BATCH_WINDOW * 20)
+    ws.disconnect()
+    await connection
+
+
+def test_batched_responses_share_one_array_frame():
+    adapter = make_adapter()
+    ws = FakeWebSocket()
+
+    asyncio.run(_serve_connection(adapter, ws, [
+        _request("list_protocols", 1, batch=True),
+        _request("activate_protocol", 2, batch=True, protocol_name="chat"),
+    ]))
+
+    assert len(ws.sent) == 1
+    frame = orjson.loads(ws.sent[0])
+    assert [response["id"] for response in frame] == [1, 2]
+    assert frame[0]["result"]["protocols"][0]["name"] == "chat"
+    assert frame[1]["result"]["protocol"]["status"] == "active"
+
+
+def test_batches_from_separate_bursts_are_separate_frames():
+    adapter = make_adapter()
+    ws = FakeWebSocket()
+
+    asyncio.run(_serve_connection(
+        adapter, ws,
+        [_request("list_protocols", 1, batch=True)],
+        [_request("list_protocols", 2, batch=True)],
+    ))
+
+    assert [[response["id"] for response in orjson.loads(frame)] for frame in ws.sent] == [[1], [2]]
+
+
+def test_unbatched_responses_bypass_the_batch():
+    adapter = make_adapter()
+    ws = FakeWebSocket()
+
+    asyncio.run(_serve_connection(adapter, ws, [
+        _request("list_protocols", 1, batch=True),
+        _request("list_protocols", 2),
+        _request("nope", 3, batch=True),
+    ]))
+
+    unbatched, batched = (orjson.loads(frame) for frame in ws.sent)
+    assert unbatched["id"] == 2
+    assert [response["id"] for response in batched] == [1, 3]
+    assert batched[1]["error"] == "Unknown action: nope"
+
+
+def test_msgpack_batch_is_an_array_frame():
+    msgpack, _ = _msgpack_codec()
+    adapter = make_adapter()
+    ws = FakeWebSocket(MSGPACK_SUBPROTOCOL)
+
+    asyncio.run(_serve_connection(adapter, ws, [
+        msgpack.packb({"action": "list_protocols", "id": 1, "batch": True}),
+        msgpack.packb({"action": "list_protocols", "id": 2, "batch": True}),
+    ]))
+
+    assert len(ws.sent) == 1
+    assert [response["id"] for response in msgpack.unpackb(ws.sent[0])] == [1, 2]
+
+
+def test_disconnect_cleans_up_queue_and_flusher():
+    adapter = make_adapter()
+    ws = FakeWebSocket()
+
+    async def main():
+        await _serve_connection(adapter, ws, [_request("list_protocols", 1, batch=True)])
+        await asyncio.sleep(0)
+        return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+    assert asyncio.run(main()) == []
+    assert adapter._out_queues == {}
+    assert adapter.connections == set()
+
+
+def _stream_frames(stream, ws=None):
+    adapter = make_adapter(FakeLLMClient(stream))
+    ws = ws or FakeWebSocket()
+    request = _request("simulate_message", 7, stream=True, content="hi", protocol="chat")
+    asyncio.run(adapter.handle_message(ws, request))
+    return [orjson.loads(frame) for frame in ws.sent]
+
+
+def test_stream_sends_start_chunks_and_end():
+    stream = FakeStream(["a", "b"])
+
+    frames = _stream_frames(stream)
+
+    assert frames == [
+        {"id": 7, "type": "start"},
+        {"id": 7, "type": "chunk", "delta": "a"},
+        {"id": 7, "type": "chunk", "delta": "b"},
+        {"id": 7, "type": "end"},
+    ]
+    assert stream.closed
+
+
+@pytest.mark.parametrize("fail_after, chunks", [(0, []), (1, ["a"])])
+def test_stream_llm_failure_ends_with_error_frame(fail_after, chunks):
+    stream = FakeStream(["a", "b"], fail_after=fail_after)
+
+    frames = _stream_frames(stream)
+
+    assert frames == [
+        {"id": 7, "type": "start"},
+        *({"id": 7, "type": "chunk", "delta": chunk} for chunk in chunks),
+        {"id": 7, "type": "error", "error": "llm down"},
+    ]
+    assert stream.closed
+
+
+def test_stream_send_failure_closes_stream_without_error_frame():
+    class ClosingWebSocket(FakeWebSocket):
+        async def send(self, frame):
+            if self.sent:
+                raise ConnectionClosedOK(None, None)
+            self.sent.append(frame)
+
+    stream = FakeStream(["a", "b"])
+
+    with pytest.raises(ConnectionClosedOK):
+        _stream_frames(stream, ClosingWebSocket())
+
+    assert stream.closed
+    assert stream.yielded == 1
+
+
+def test_encoded_protocol_list_follows_registry_start_and_stop():
+    adapter = make_adapter()
+    registry = adapter.protocol_registry
+
+    async def main():
+        statuses = []
+        for change in (None, registry.start, registry.stop):
+            if change is not None:
+                await change("chat")
+            listing = orjson.loads(await adapter.encoded_protocol_list(JSON_CODEC))
+            statuses.append(listing["protocols"][0]["status"])
+        return statuses
+
+    assert asyncio.run(main()) == ["inactive", "active", "inactive"]
+
+
+def test_list_protocols_reply_follows_activate_and_deactivate():
+    adapter = make_adapter()
+    ws = FakeWebSocket()
+
+    async def main():
+        for request_id, action in enumerate(
+            ["list_protocols", "activate_protocol", "list_protocols",
+             "deactivate_protocol", "list_protocols"]
+        ):
+            await adapter.handle_message(ws, _request(action, request_id, protocol_name="chat"))
+
+    asyncio.run(main())
+
+    listings = [orjson.loads(frame)["result"] for frame in ws.sent[::2]]
+    assert [listing["protocols"][0]["status"] for listing in listings] == ["inactive", "active", "inactive"]
@@ -2,3 +2,107 @@
 test_rest_api.py
 """
 
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from protocol_integration.core.protocol import ProtocolRegistry
+from protocol_integration.interfaces.rest import app as rest_app
+
+from .test_mcp import FakeLLMClient, FakeProtocol, FakeStream
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = ProtocolRegistry()
+    registry.register("chat", FakeProtocol())
+    monkeypatch.setattr(rest_app, "protocol_registry", registry)
+    return registry
+
+
+@pytest.fixture
+def client(registry, monkeypatch):
+    monkeypatch.setattr(rest_app, "_protocols_cache", None)
+    # Not used as a context manager, so the startup handler does not run
+    return TestClient(rest_app.app, raise_server_exceptions=False)
+
+
+def _simulate_stream(client, monkeypatch, stream, **body):
+    monkeypatch.setattr(rest_app, "llm_client", FakeLLMClient(stream))
+    return client.post("/simulate/stream", json={"content": "hi", "protocol": "chat", **body})
+
+
+def test_simulate_stream_returns_chunks(client, monkeypatch):
+    stream = FakeStream(["a", "b"])
+
+    response = _simulate_stream(client, monkeypatch, stream)
+
+    assert response.status_code == 200
+    assert response.text == "ab"
+    assert stream.closed
+
+
+def test_simulate_stream_failure_before_first_chunk_is_500(client, monkeypatch):
+    stream = FakeStream(["a"], fail_after=0)
+
+    response = _simulate_stream(client, monkeypatch, stream)
+
+    assert response.status_code == 500
+    assert response.json() == {"detail": "llm down"}
+    assert stream.closed
+
+
+def test_simulate_stream_failure_after_first_chunk_ends_with_marker(client, monkeypatch):
+    stream = FakeStream(["a", "b"], fail_after=1)
+
+    response = _simulate_stream(client, monkeypatch, stream)
+
+    assert response.status_code == 200
+    assert response.text == "a\n[error: llm down]\n"
+    assert stream.closed
+
+
+def test_simulate_stream_validates_request(client, monkeypatch):
+    stream = FakeStream(["a"])
+
+    assert _simulate_stream(client, monkeypatch, stream, content="").status_code == 400
+    assert _simulate_stream(client, monkeypatch, stream, protocol="nope").status_code == 404
+    assert stream.yielded == 0
+
+
+def _statuses(client):
+    response = client.get("/protocols")
+    assert response.status_code == 200
+    return {protocol["name"]: protocol["status"] for protocol in response.json()}
+
+
+def test_protocol_listing_follows_registry_start_and_stop(client, registry):
+    assert _statuses(client) == {"chat": "inactive"}
+
+    asyncio.run(registry.start("chat"))
+    assert _statuses(client) == {"chat": "active"}
+
+    asyncio.run(registry.stop("chat"))
+    assert _statuses(client) == {"chat": "inactive"}
+
+
+def test_protocol_listing_follows_activate_and_deactivate(client):
+    assert client.post("/protocols/chat/activate").status_code == 200
+    assert _statuses(client) == {"chat": "active"}
+
+    assert client.post("/protocols/chat/deactivate").status_code == 200
+    assert _statuses(client) == {"chat": "inactive"}
+
+
+def test_protocol_listing_is_not_shared_between_registries(client, registry, monkeypatch):
+    assert _statuses(client) == {"chat": "inactive"}
+
+    # Same version as the first registry, so only its identity tells them apart
+    other = ProtocolRegistry()
+    other.register("email", FakeProtocol())
+    assert other.version == registry.version
+    monkeypatch.setattr(rest_app, "protocol_registry", other)
+
+    assert _statuses(client) == {"email": "inactive"}
@@ -0,0 +1,82 @@
+"""
+test_routing.py
+"""
+
+import asyncio
+
+from protocol_integration.core.routing import MessageDispatcher
+
+
+class RecordingProtocol:
+    def __init__(self, fail_on=()):
+        self.sent = []
+        self.fail_on = set(fail_on)
+
+    async def send_message(self, message):
+        if message in self.fail_on:
+            raise RuntimeError("send failed")
+        self.sent.append(message)
+
+
+async def _drain(dispatcher, protocol):
+    await dispatcher._queues[protocol].join()
+
+
+def test_dispatcher_delivers_queued_messages():
+    async def main():
+        dispatcher = MessageDispatcher(maxsize=10, workers=2)
+        protocol = RecordingProtocol()
+        for message in ("a", "b", "c"):
+            assert dispatcher.submit(protocol, message)
+        await _drain(dispatcher, protocol)
+        await dispatcher.close()
+        return protocol.sent
+
+    assert sorted(asyncio.run(main())) == ["a", "b", "c"]
+
+
+def test_dispatcher_submit_returns_false_when_full():
+    async def main():
+        dispatcher = MessageDispatcher(maxsize=2, workers=1)
+        protocol = RecordingProtocol()
+        # Workers cannot drain until the loop runs, so the queue fills up
+        results = [dispatcher.submit(protocol, message) for message in ("a", "b", "c")]
+        await dispatcher.close()
+        return results
+
+    assert asyncio.run(main()) == [True, True, False]
+
+
+def test_dispatcher_worker_survives_send_errors():
+    async def main():
+        dispatcher = MessageDispatcher(maxsize=10, workers=1)
+        protocol = RecordingProtocol(fail_on={"bad"})
+        dispatcher.submit(protocol, "bad")
+        dispatcher.submit(protocol, "good")
+        await _drain(dispatcher, protocol)
+        await dispatcher.close()
+        return protocol.sent
+
+    assert asyncio.run(main()) == ["good"]
+
+
+def test_dispatcher_close_stops_workers_and_restarts_lazily():
+    async def main():
+        dispatcher = MessageDispatcher(maxsize=10, workers=3)
+        protocol = RecordingProtocol()
+        dispatcher.submit(protocol, "a")
+        tasks = list(dispatcher._tasks)
+        assert len(tasks) == 3
+
+        await dispatcher.close()
+        assert all(task.cancelled() for task in tasks)
+        assert dispatcher._tasks == []
+        assert dispatcher._queues == {}
+
+        # A new submit starts a fresh queue and workers
+        assert dispatcher.submit(protocol, "b")
+        await _drain(dispatcher, protocol)
+        await dispatcher.close()
+        return protocol.sent
+
+    assert "b" in asyncio.run(main())
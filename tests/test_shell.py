@@ -2,3 +2,41 @@
 test_shell.py
 """
 
+
+import asyncio
+
+from protocol_integration.core.protocol import ProtocolRegistry
+from protocol_integration.interfaces.shell.interactive import ProtocolShell
+
+
+class TaskProtocol:
+    def __init__(self):
+        self.running = False
+        self.task = None
+
+    def is_running(self):
+        return self.running
+
+    async def start(self):
+        # Background work that stop() does not clean up itself
+        self.task = asyncio.create_task(asyncio.sleep(3600))
+        self.running = True
+
+    async def stop(self):
+        self.running = False
+
+
+def test_exit_stops_protocols_and_cancels_tasks():
+    registry = ProtocolRegistry()
+    protocol = TaskProtocol()
+    registry.register("chat", protocol)
+    shell = ProtocolShell(llm_client=None, protocol_registry=registry)
+
+    shell.do_activate("chat")
+    assert protocol.is_running()
+    assert shell.do_exit("") is True
+
+    assert not protocol.is_running()
+    assert protocol.task.cancelled()
+    assert shell.loop.is_closed()
+    assert not shell._loop_thread.is_alive()